@@ -1,14 +1,23 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, Response, stream_with_context
 from flask_cors import CORS
 import joblib
 import numpy as np
 import pandas as pd
 import sqlite3
+import ast
+import csv
+import io
+import json
+import math
+import time
+import zlib
+import click
 from datetime import datetime
 import os
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
 from ml_evaluator import MLModelEvaluator
+from shadow_evaluator import ShadowModelEvaluator
 
 app = Flask(__name__)
 CORS(app)
@@ -50,6 +59,29 @@ except Exception as e:
     
     role_encoder = FallbackEncoder()
 
+# Shadow-evaluate a candidate model on sampled /predict traffic when configured
+shadow_evaluator = None
+if model is not None and os.environ.get('SHADOW_MODEL_PATH'):
+    try:
+        shadow_sample_rate = float(os.environ.get('SHADOW_SAMPLE_RATE', '0.1'))
+        if not math.isfinite(shadow_sample_rate):
+            raise ValueError(shadow_sample_rate)
+        if not 0.0 <= shadow_sample_rate <= 1.0:
+            print(f"⚠️ SHADOW_SAMPLE_RATE {shadow_sample_rate} is outside [0, 1], clamping")
+            shadow_sample_rate = min(1.0, max(0.0, shadow_sample_rate))
+    except ValueError:
+        print(f"⚠️ Invalid SHADOW_SAMPLE_RATE {os.environ['SHADOW_SAMPLE_RATE']!r}, shadow evaluation disabled")
+        shadow_sample_rate = 0.0
+
+    if shadow_sample_rate > 0:
+        # The candidate is loaded lazily on the first sampled /predict request
+        shadow_evaluator = ShadowModelEvaluator(
+            os.environ['SHADOW_MODEL_PATH'],
+            role_encoder.classes_,
+            role_encoder_path=os.environ.get('SHADOW_ROLE_ENCODER_PATH'),
+            sample_rate=shadow_sample_rate
+        )
+
 # Subject mapping for the assessment form
 SUBJECTS = {
     'Database Fundamentals': 'skill1',
@@ -138,7 +170,10 @@ def init_db():
     """Initialize SQLite database for storing assessments and users"""
     conn = sqlite3.connect('career_assessments.db')
     cursor = conn.cursor()
-    
+
+    # WAL lets long-running exports read while /predict keeps writing
+    cursor.execute('PRAGMA journal_mode=WAL')
+
     # Users table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -162,10 +197,37 @@ def init_db():
             FOREIGN KEY (user_id) REFERENCES users (id)
         )
     ''')
-    
+
+    # Analytics rollups, maintained incrementally by store_assessment
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analytics_daily_careers (
+            day DATE NOT NULL,
+            career TEXT NOT NULL,
+            assessment_count INTEGER NOT NULL DEFAULT 0,
+            confidence_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, career)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analytics_daily_subject_ratings (
+            day DATE NOT NULL,
+            subject TEXT NOT NULL,
+            rating_count INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, subject)
+        )
+    ''')
+
+    # Superseded by analytics_daily_subject_ratings; rebuild with backfill-analytics
+    cursor.execute('DROP TABLE IF EXISTS analytics_subject_ratings')
+
     conn.commit()
     conn.close()
 
+# Create tables and switch to WAL on startup, whether run directly, via flask run or under WSGI
+init_db()
+
 def convert_ratings_to_features(ratings):
     """Convert user ratings to model input format"""
     # Convert ratings to 0-1 scale for model input
@@ -183,6 +245,29 @@ def convert_ratings_to_features(ratings):
     
     return np.array(features).reshape(1, -1)
 
+def build_sweep_features(ratings):
+    """Build the what-if feature matrix for a rating set.
+
+    Row 0 is the unmodified rating set; each following row sets one subject
+    to one rating level, in SUBJECTS x RATING_SCALE order.
+    """
+    base = convert_ratings_to_features(ratings)
+    levels = np.array(list(RATING_SCALE.values())) / 6.0
+    n_subjects, n_levels = len(SUBJECTS), len(levels)
+
+    matrix = np.repeat(base, 1 + n_subjects * n_levels, axis=0)
+    for col in range(n_subjects):
+        start = 1 + col * n_levels
+        matrix[start:start + n_levels, col] = levels
+
+    return matrix
+
+def top_careers(probabilities, top_n):
+    """Return the top-n careers with confidence scores for one probability row"""
+    top_indices = probabilities.argsort()[::-1][:top_n]
+    return [{'name': role_encoder.classes_[idx], 'confidence': float(probabilities[idx])}
+            for idx in top_indices]
+
 # Authentication decorator
 def login_required(f):
     @wraps(f)
@@ -274,10 +359,17 @@ def predict_career():
         if model is not None and role_encoder is not None and feature_columns is not None:
             try:
                 # Get predicted probabilities for all classes
+                start = time.perf_counter()
                 probabilities = model.predict_proba(features)[0]
+                serving_latency = time.perf_counter() - start
                 
                 # Get top 5 career predictions with confidence scores
                 top_indices = probabilities.argsort()[::-1][:5]
+                
+                # Queue a sample for the shadow model without waiting on it
+                if shadow_evaluator:
+                    shadow_evaluator.submit(features, role_encoder.classes_[top_indices[0]],
+                                            float(probabilities[top_indices[0]]), serving_latency)
                 predictions = []
                 
                 for idx in top_indices:
@@ -334,6 +426,53 @@ def predict_career():
         print(f"Error in predict_career: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/predict/sweep', methods=['POST'])
+def predict_sweep():
+    """Show how the top careers shift when each subject is set to each rating level"""
+    try:
+        data = request.json or {}
+        ratings = data.get('ratings', {})
+
+        if not ratings:
+            return jsonify({'success': False, 'error': 'No ratings provided'}), 400
+
+        n_careers = len(role_encoder.classes_)
+        try:
+            top_n = int(str(data.get('top_n', 3)))
+        except ValueError:
+            top_n = 0
+        if not 1 <= top_n <= n_careers:
+            return jsonify({'success': False, 'error': f'top_n must be an integer between 1 and {n_careers}'}), 400
+
+        if model is None or feature_columns is None:
+            return jsonify({'success': False, 'error': 'ML model not available'}), 503
+
+        # Score every variant in a single batched call
+        probabilities = model.predict_proba(build_sweep_features(ratings))
+
+        base = top_careers(probabilities[0], top_n)
+        sweep = {}
+        row = 1
+        for subject in SUBJECTS.keys():
+            sweep[subject] = {}
+            for level in RATING_SCALE.keys():
+                careers = top_careers(probabilities[row], top_n)
+                sweep[subject][level] = {
+                    'careers': careers,
+                    'top_changed': careers[0]['name'] != base[0]['name']
+                }
+                row += 1
+
+        return jsonify({
+            'success': True,
+            'base': base,
+            'sweep': sweep
+        })
+
+    except Exception as e:
+        print(f"Error in predict_sweep: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 def generate_fallback_predictions(ratings):
     """Generate career predictions based on subject ratings when ML model is unavailable"""
     # Career scoring based on subject relevance
@@ -397,11 +536,302 @@ def store_assessment(ratings, predictions, accuracy):
                 INSERT INTO assessments (user_id, ratings, predictions, model_accuracy)
                 VALUES (?, ?, ?, ?)
             ''', (user_id, str(ratings), str(predictions), accuracy))
+            cursor.execute('SELECT date(timestamp) FROM assessments WHERE id = ?', (cursor.lastrowid,))
+            day = cursor.fetchone()[0]
+            update_analytics_rollups(cursor, day, ratings, predictions[0]['name'], accuracy)
             conn.commit()
             conn.close()
     except Exception as e:
         print(f"Database error: {e}")
 
+def update_analytics_rollups(cursor, day, ratings, top_career, confidence):
+    """Fold a single assessment into the analytics rollup tables"""
+    cursor.execute('''
+        INSERT INTO analytics_daily_careers (day, career, assessment_count, confidence_sum)
+        VALUES (?, ?, 1, ?)
+        ON CONFLICT (day, career) DO UPDATE SET
+            assessment_count = assessment_count + 1,
+            confidence_sum = confidence_sum + excluded.confidence_sum
+    ''', (day, top_career, confidence))
+
+    subject_ratings = [(day, subject, RATING_SCALE[rating]) for subject, rating in ratings.items()
+                       if subject in SUBJECTS and rating in RATING_SCALE]
+    cursor.executemany('''
+        INSERT INTO analytics_daily_subject_ratings (day, subject, rating_count, rating_sum)
+        VALUES (?, ?, 1, ?)
+        ON CONFLICT (day, subject) DO UPDATE SET
+            rating_count = rating_count + 1,
+            rating_sum = rating_sum + excluded.rating_sum
+    ''', subject_ratings)
+
+def accumulate_analytics_rollups(rows, daily_careers, subject_ratings):
+    """Fold stored assessment rows into in-memory rollup totals"""
+    processed = 0
+    skipped = 0
+    for day, ratings, predictions, accuracy in rows:
+        try:
+            ratings = ast.literal_eval(ratings)
+            top_career = ast.literal_eval(predictions)[0]['name']
+        except (ValueError, SyntaxError, IndexError, KeyError, TypeError):
+            skipped += 1
+            continue
+
+        count, confidence_sum = daily_careers.get((day, top_career), (0, 0.0))
+        daily_careers[(day, top_career)] = (count + 1, confidence_sum + (accuracy or 0.0))
+        for subject, rating in ratings.items():
+            if subject in SUBJECTS and rating in RATING_SCALE:
+                count, rating_sum = subject_ratings.get((day, subject), (0, 0))
+                subject_ratings[(day, subject)] = (count + 1, rating_sum + RATING_SCALE[rating])
+        processed += 1
+    return processed, skipped
+
+def backfill_analytics():
+    """Rebuild the analytics rollup tables from the stored assessments
+
+    Totals are built from a read-only scan, so /predict inserts are not held
+    behind the write lock while rows are parsed. Assessments stored during the
+    scan are folded in inside the short transaction that swaps the rollups.
+    """
+    query = 'SELECT date(timestamp), ratings, predictions, model_accuracy FROM assessments WHERE id > ? AND id <= ?'
+    daily_careers = {}
+    subject_ratings = {}
+
+    conn = sqlite3.connect('career_assessments.db', isolation_level=None)
+    cursor = conn.cursor()
+    cursor.execute('SELECT COALESCE(MAX(id), 0) FROM assessments')
+    scanned_id = cursor.fetchone()[0]
+    cursor.execute(query, (0, scanned_id))
+    processed, skipped = accumulate_analytics_rollups(cursor, daily_careers, subject_ratings)
+
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('SELECT COALESCE(MAX(id), 0) FROM assessments')
+        latest_id = cursor.fetchone()[0]
+        cursor.execute(query, (scanned_id, latest_id))
+        tail_processed, tail_skipped = accumulate_analytics_rollups(cursor.fetchall(), daily_careers, subject_ratings)
+
+        cursor.execute('DELETE FROM analytics_daily_careers')
+        cursor.execute('DELETE FROM analytics_daily_subject_ratings')
+        cursor.executemany('''
+            INSERT INTO analytics_daily_careers (day, career, assessment_count, confidence_sum)
+            VALUES (?, ?, ?, ?)
+        ''', [(day, career, count, confidence_sum)
+              for (day, career), (count, confidence_sum) in daily_careers.items()])
+        cursor.executemany('''
+            INSERT INTO analytics_daily_subject_ratings (day, subject, rating_count, rating_sum)
+            VALUES (?, ?, ?, ?)
+        ''', [(day, subject, count, rating_sum)
+              for (day, subject), (count, rating_sum) in subject_ratings.items()])
+        cursor.execute('COMMIT')
+    except Exception:
+        cursor.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+    return processed + tail_processed, skipped + tail_skipped
+
+@app.cli.command('backfill-analytics')
+def backfill_analytics_command():
+    """Rebuild analytics rollups from existing assessments."""
+    processed, skipped = backfill_analytics()
+    print(f"✅ Analytics rollups rebuilt from {processed} assessments ({skipped} skipped)")
+
+def parse_positive_int(value):
+    """Parse a query value as an integer >= 1, raising ValueError otherwise"""
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError(f'Not a positive integer: {value}')
+    return int(value)
+
+@app.route('/analytics')
+@login_required
+def analytics():
+    """Get career distribution, confidence and subject rating rollups"""
+    try:
+        days = request.args.get('days')
+        if days is not None:
+            try:
+                days = parse_positive_int(days)
+            except ValueError:
+                return jsonify({'success': False, 'error': 'days must be a positive integer'}), 400
+
+        conn = sqlite3.connect('career_assessments.db')
+        cursor = conn.cursor()
+
+        # Both rollups are keyed by day, so the same window applies to every metric
+        day_filter = "WHERE day >= date('now', ?)" if days else ''
+        params = (f'-{days - 1} days',) if days else ()
+
+        cursor.execute(f'''
+            SELECT day, career, assessment_count, confidence_sum FROM analytics_daily_careers
+            {day_filter} ORDER BY day, career
+        ''', params)
+        daily_rows = cursor.fetchall()
+
+        cursor.execute(f'''
+            SELECT subject, SUM(rating_count), SUM(rating_sum) FROM analytics_daily_subject_ratings
+            {day_filter} GROUP BY subject
+        ''', params)
+        subject_rows = cursor.fetchall()
+        conn.close()
+
+        career_distribution = {}
+        career_totals = {}
+        total_assessments = 0
+        total_confidence = 0.0
+        for day, career, count, confidence_sum in daily_rows:
+            career_distribution.setdefault(day, {})[career] = count
+            career_totals[career] = career_totals.get(career, 0) + count
+            total_assessments += count
+            total_confidence += confidence_sum
+
+        subject_averages = {subject: rating_sum / count
+                            for subject, count, rating_sum in subject_rows if count}
+
+        return jsonify({
+            'success': True,
+            'total_assessments': total_assessments,
+            'average_confidence': total_confidence / total_assessments if total_assessments else 0.0,
+            'career_totals': career_totals,
+            'career_distribution': career_distribution,
+            'subject_averages': subject_averages
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+EXPORT_COLUMNS = ['id', 'user_id', 'username', 'timestamp', 'top_career', 'model_accuracy', 'ratings', 'predictions']
+
+def parse_stored_value(text):
+    """Parse a repr-string column back into a Python object, keeping the raw text if it is malformed"""
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, TypeError):
+        return text
+
+def iter_assessment_batches(start_date=None, end_date=None, user_id=None):
+    """Yield stored assessments in fixed-size batches from a server-side cursor"""
+    query = '''
+        SELECT a.id, a.user_id, u.username, a.timestamp, a.ratings, a.predictions, a.model_accuracy
+        FROM assessments a LEFT JOIN users u ON u.id = a.user_id
+        WHERE 1 = 1
+    '''
+    params = []
+    if start_date:
+        query += ' AND a.timestamp >= date(?)'
+        params.append(start_date)
+    if end_date:
+        query += " AND a.timestamp < date(?, '+1 day')"
+        params.append(end_date)
+    if user_id is not None:
+        query += ' AND a.user_id = ?'
+        params.append(user_id)
+    query += ' ORDER BY a.id'
+
+    conn = sqlite3.connect('career_assessments.db')
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+def encode_assessment_batch(rows, export_format):
+    """Encode a batch of assessment rows as CSV or NDJSON text"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+
+    for assessment_id, user_id, username, timestamp, ratings, predictions, accuracy in rows:
+        ratings = parse_stored_value(ratings)
+        predictions = parse_stored_value(predictions)
+        top_career = predictions[0].get('name') if isinstance(predictions, list) and predictions else None
+
+        if writer:
+            writer.writerow([assessment_id, user_id, username, timestamp, top_career, accuracy,
+                             json.dumps(ratings), json.dumps(predictions)])
+        else:
+            record = dict(zip(EXPORT_COLUMNS, [assessment_id, user_id, username, timestamp, top_career,
+                                               accuracy, ratings, predictions]))
+            buffer.write(json.dumps(record) + '\n')
+
+    return buffer.getvalue()
+
+def generate_assessment_export(export_format, start_date=None, end_date=None, user_id=None):
+    """Yield gzip-compressed export chunks, one batch of assessments at a time"""
+    compressor = zlib.compressobj(wbits=31)  # 31 selects the gzip container
+
+    if export_format == 'csv':
+        header = io.StringIO()
+        csv.writer(header).writerow(EXPORT_COLUMNS)
+        yield compressor.compress(header.getvalue().encode('utf-8'))
+
+    for rows in iter_assessment_batches(start_date, end_date, user_id):
+        chunk = compressor.compress(encode_assessment_batch(rows, export_format).encode('utf-8'))
+        if chunk:
+            yield chunk
+
+    yield compressor.flush()
+
+def parse_export_date(value):
+    """Normalize a YYYY-MM-DD filter value, raising ValueError if it is malformed"""
+    return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+
+@app.route('/export')
+@login_required
+def export_assessments():
+    """Stream the logged-in user's assessments as a gzip-compressed CSV or NDJSON download"""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'error': f'Unsupported export format: {export_format}'}), 400
+
+    try:
+        start_date = request.args.get('start')
+        start_date = parse_export_date(start_date) if start_date else None
+        end_date = request.args.get('end')
+        end_date = parse_export_date(end_date) if end_date else None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'start and end must be dates in YYYY-MM-DD format'}), 400
+
+    # Cross-user bulk exports are only available through the export-assessments CLI command
+    user_id = session['user_id']
+
+    filename = f"assessments-{datetime.now().strftime('%Y%m%d%H%M%S')}.{export_format}.gz"
+    return Response(
+        stream_with_context(generate_assessment_export(export_format, start_date, end_date, user_id)),
+        mimetype='application/gzip',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+def validate_export_date(ctx, param, value):
+    """Click callback applying parse_export_date to --start/--end"""
+    if value is None:
+        return None
+    try:
+        return parse_export_date(value)
+    except ValueError:
+        raise click.BadParameter('expected a date in YYYY-MM-DD format')
+
+@app.cli.command('export-assessments')
+@click.option('--format', 'export_format', type=click.Choice(list(EXPORT_FORMATS)), default='csv')
+@click.option('--start', 'start_date', callback=validate_export_date, help='Earliest assessment date (YYYY-MM-DD)')
+@click.option('--end', 'end_date', callback=validate_export_date, help='Latest assessment date (YYYY-MM-DD)')
+@click.option('--user-id', type=click.IntRange(min=1), help='Only export assessments for this user')
+@click.option('--output', type=click.Path(dir_okay=False), required=True, help='Destination .gz file')
+def export_assessments_command(export_format, start_date, end_date, user_id, output):
+    """Export stored assessments to a gzip-compressed CSV or NDJSON file."""
+    with open(output, 'wb') as f:
+        for chunk in generate_assessment_export(export_format, start_date, end_date, user_id):
+            f.write(chunk)
+    print(f"✅ Assessments exported to {output}")
+
 @app.route('/career/<career_name>')
 def career_details(career_name):
     """Get detailed information about a specific career"""
@@ -446,6 +876,14 @@ def model_performance():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/shadow-metrics')
+@login_required
+def shadow_metrics():
+    """Get shadow model agreement, confidence and latency comparison"""
+    if shadow_evaluator is None:
+        return jsonify({'success': False, 'error': 'Shadow evaluation is not enabled'}), 404
+    return jsonify({'success': True, 'shadow': shadow_evaluator.get_summary()})
+
 @app.route('/learning-resources')
 def learning_resources():
     """Get learning resources for different subjects"""
@@ -484,5 +922,4 @@ def learning_resources():
     return jsonify({'success': True, 'resources': resources})
 
 if __name__ == '__main__':
-    init_db()
     app.run(debug=True, host='0.0.0.0', port=5000)
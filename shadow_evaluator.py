@@ -0,0 +1,170 @@
+import queue
+import random
+import threading
+import time
+import numpy as np
+import joblib
+
+class ShadowModelEvaluator:
+    """Score sampled live traffic with a candidate model off the request path"""
+
+    def __init__(self, model_path, serving_classes, role_encoder_path=None, sample_rate=0.1,
+                 batch_size=32, num_workers=2, max_queue_size=1000):
+        self.model_path = model_path
+        self.serving_classes = serving_classes
+        self.role_encoder_path = role_encoder_path
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.model = None
+        self.classes = None
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.lock = threading.Lock()
+        self.workers = []
+        self.status = 'idle'
+        self.stats = {
+            'sampled': 0,
+            'dropped': 0,
+            'scored': 0,
+            'errors': 0,
+            'top1_agreements': 0,
+            'confidence_delta_sum': 0.0,
+            'serving_latency_sum': 0.0,
+            'shadow_latency_sum': 0.0,
+            'shadow_latency_samples': 0,
+            'batch_latency_sum': 0.0,
+            'batches': 0
+        }
+
+    def load_model(self):
+        """Load the candidate model, reusing the serving class names if no encoder is given"""
+        try:
+            self.model = joblib.load(self.model_path)
+            if self.role_encoder_path:
+                self.classes = joblib.load(self.role_encoder_path).classes_
+            else:
+                self.classes = self.serving_classes
+            print(f"✅ Shadow model loaded from {self.model_path}")
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not load shadow model: {e}")
+            return False
+
+    def _start(self):
+        """Load the candidate and start the worker pool, off the request path"""
+        if not self.load_model():
+            self.status = 'failed'
+            # Discard samples queued while loading; nothing will ever score them
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            return
+
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"shadow-worker-{i}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+        self.status = 'running'
+        print(f"🔍 Shadow evaluation running at {self.sample_rate:.0%} sample rate")
+
+    def submit(self, features, serving_career, serving_confidence, serving_latency):
+        """Hand a served prediction to the shadow workers; never blocks the caller
+
+        The candidate is loaded and the pool started on the first sampled request,
+        so only a process that actually serves traffic (not e.g. the debug
+        reloader's watcher) pays for them.
+        """
+        if self.status == 'failed' or random.random() >= self.sample_rate:
+            return
+
+        if self.status == 'idle':
+            with self.lock:
+                if self.status == 'idle':
+                    self.status = 'loading'
+                    threading.Thread(target=self._start, name='shadow-loader', daemon=True).start()
+
+        try:
+            self.queue.put_nowait((features[0], serving_career, serving_confidence, serving_latency))
+            with self.lock:
+                self.stats['sampled'] += 1
+        except queue.Full:
+            with self.lock:
+                self.stats['dropped'] += 1
+
+    def _next_batch(self):
+        """Block for one sampled request, then drain up to a full batch without waiting"""
+        batch = [self.queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker_loop(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._score_batch(batch)
+            except Exception as e:
+                print(f"Shadow scoring error: {e}")
+                with self.lock:
+                    self.stats['errors'] += len(batch)
+
+    def _score_batch(self, batch):
+        features = np.vstack([item[0] for item in batch])
+
+        start = time.perf_counter()
+        probabilities = self.model.predict_proba(features)
+        batch_latency = time.perf_counter() - start
+
+        # Time one single-row call per batch so it compares like-for-like with serving
+        start = time.perf_counter()
+        self.model.predict_proba(features[:1])
+        shadow_latency = time.perf_counter() - start
+
+        top_indices = probabilities.argmax(axis=1)
+        agreements = 0
+        confidence_delta_sum = 0.0
+        serving_latency_sum = 0.0
+        for row, (_, serving_career, serving_confidence, serving_latency) in enumerate(batch):
+            if self.classes[top_indices[row]] == serving_career:
+                agreements += 1
+            confidence_delta_sum += float(probabilities[row, top_indices[row]]) - serving_confidence
+            serving_latency_sum += serving_latency
+
+        with self.lock:
+            self.stats['scored'] += len(batch)
+            self.stats['batches'] += 1
+            self.stats['top1_agreements'] += agreements
+            self.stats['confidence_delta_sum'] += confidence_delta_sum
+            self.stats['serving_latency_sum'] += serving_latency_sum
+            self.stats['shadow_latency_sum'] += shadow_latency
+            self.stats['shadow_latency_samples'] += 1
+            self.stats['batch_latency_sum'] += batch_latency
+
+    def get_summary(self):
+        """Get agreement, confidence and latency comparison against the serving model"""
+        with self.lock:
+            stats = dict(self.stats)
+
+        scored = stats['scored']
+        batches = stats['batches']
+        latency_samples = stats['shadow_latency_samples']
+        return {
+            'status': self.status,
+            'sample_rate': self.sample_rate,
+            'sampled': stats['sampled'],
+            'dropped': stats['dropped'],
+            'scored': scored,
+            'errors': stats['errors'],
+            'pending': self.queue.qsize(),
+            'top1_agreement': stats['top1_agreements'] / scored if scored else None,
+            'mean_confidence_delta': stats['confidence_delta_sum'] / scored if scored else None,
+            'mean_serving_latency_ms': stats['serving_latency_sum'] / scored * 1000 if scored else None,
+            'mean_shadow_latency_ms': stats['shadow_latency_sum'] / latency_samples * 1000 if latency_samples else None,
+            'mean_batch_latency_ms': stats['batch_latency_sum'] / batches * 1000 if batches else None,
+            'mean_batch_size': scored / batches if batches else None
+        }
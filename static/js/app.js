@@ -96,6 +96,7 @@ class CareerGuidanceApp {
                 console.log('Displaying results');
                 this.displayResults(data);
                 this.showResultsSection();
+                this.loadSensitivity(ratings);
             } else {
                 const error = data.error || 'An error occurred during prediction';
                 console.error('Prediction error:', error);
@@ -212,6 +213,77 @@ class CareerGuidanceApp {
         this.animateProgressBars();
     }
 
+    async loadSensitivity(ratings) {
+        const container = document.getElementById('sensitivityResults');
+        if (!container) {
+            return;
+        }
+
+        // Keep the section hidden until this sweep succeeds
+        const section = document.getElementById('sensitivitySection');
+        if (section) {
+            section.classList.add('d-none');
+        }
+
+        try {
+            const response = await fetch('/predict/sweep', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ ratings, top_n: 1 })
+            });
+            const data = await response.json();
+
+            if (data.success) {
+                this.sensitivity = data;
+                this.displaySensitivity(container, ratings);
+            } else {
+                console.warn('Sensitivity sweep unavailable:', data.error);
+            }
+        } catch (error) {
+            console.error('Error loading sensitivity sweep:', error);
+        }
+    }
+
+    displaySensitivity(container, ratings) {
+        const { base = [], sweep = {} } = this.sensitivity || {};
+        if (base.length === 0) {
+            return;
+        }
+
+        let html = '';
+        Object.entries(sweep).forEach(([subject, levels]) => {
+            const options = Object.keys(levels).map(level => `
+                <option value="${level}" ${ratings[subject] === level ? 'selected' : ''}>${level}</option>`).join('');
+
+            html += `
+                <div class="col-md-6 col-lg-4 mb-3">
+                    <label class="form-label small fw-semibold">${subject}</label>
+                    <select class="form-select form-select-sm sensitivity-select" data-subject="${subject}">${options}</select>
+                    <small class="text-muted sensitivity-outcome" data-subject="${subject}"></small>
+                </div>`;
+        });
+        container.innerHTML = html;
+
+        const section = document.getElementById('sensitivitySection');
+        if (section) {
+            section.classList.remove('d-none');
+        }
+
+        container.querySelectorAll('.sensitivity-select').forEach(select => {
+            const update = () => {
+                const outcome = container.querySelector(`.sensitivity-outcome[data-subject="${select.dataset.subject}"]`);
+                const variant = sweep[select.dataset.subject][select.value];
+                const top = variant.careers[0];
+                outcome.textContent = `${top.name} (${Math.round(top.confidence * 100)}%)`;
+                outcome.className = `small sensitivity-outcome ${variant.top_changed ? 'text-warning fw-bold' : 'text-muted'}`;
+            };
+            select.addEventListener('change', update);
+            update();
+        });
+    }
+
     getCareerIcon(careerName) {
         const iconMap = {
             'Data Scientist': 'brain',